@@ -1,4 +1,6 @@
 from argparse import ArgumentTypeError
+import os
+import sys
 from pathlib import Path
 from .types import Command
 
@@ -16,6 +18,12 @@ class Colors:
     MAGENTA = "\u001b[35m"
 
 
+if not sys.stdout.isatty():
+    # don't litter piped output (CI logs, tee, etc.) with escape sequences
+    for color in [attr for attr in vars(Colors) if attr.isupper()]:
+        setattr(Colors, color, "")
+
+
 def error(msg: str) -> None:
     print(f"{Colors.FAIL}[ERROR]{Colors.ENDC} {msg}")
     exit(1)
@@ -87,5 +95,5 @@ def validate_build_cmd_from_cli(build_cmd: Command) -> None:
         info("Adding V=1 to build command")
         build_cmd.append("V=1")
 
-    if any([str(part).endswith(".i") for part in build_cmd]):  # cast is *necessary*
+    if any(os.fspath(part).endswith(".i") for part in build_cmd):
         raise RuntimeError("Don't include the target .i file in your build command")
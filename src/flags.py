@@ -26,12 +26,13 @@ class FlagReducer:
     ABSOLUTE_FLAG_PATTERN = r"\$\(.*\)"
     DOT_I_PATTERN = r"\w+\.i"
     PREMADE_TEST_PATTERN = r"<your test here>"
+    STREAM_BUFFER_SIZE = 1 << 16
 
     def __init__(self, cli_args: argparse.Namespace):
         self.cli_args = cli_args
-        self.flags_txt: Path = self.cli_args.path_to_flags / Path("flags.txt")
-        self.test_sh: Path = self.cli_args.path_to_flags / Path("test.sh")
-        self.flags_sh: Path = self.cli_args.path_to_flags / Path("flags.sh")
+        self.flags_txt: Path = self.cli_args.path_to_flags / "flags.txt"
+        self.test_sh: Path = self.cli_args.path_to_flags / "test.sh"
+        self.flags_sh: Path = self.cli_args.path_to_flags / "flags.sh"
 
     @classmethod
     def setup_argparser(cls, parser: argparse.ArgumentParser) -> None:
@@ -105,9 +106,7 @@ class FlagReducer:
 
         matches = re.findall(FlagReducer.DOT_I_PATTERN, flags_sh_text)
 
-        absolute_target_path = (
-            self.cli_args.path_to_flags / Path(matches[0])
-        ).absolute()
+        absolute_target_path = (self.cli_args.path_to_flags / matches[0]).absolute()
 
         flags_sh_text = re.sub(
             FlagReducer.DOT_I_PATTERN, str(absolute_target_path), flags_sh_text
@@ -122,13 +121,24 @@ class FlagReducer:
         info("Using cvise to reduce flags")
         chdir(self.cli_args.path_to_flags)
         command = ["cvise-delta", self.flags_sh.name, self.flags_txt.name]
-        result = subprocess.run(command, stdout=subprocess.PIPE)
-        if result.returncode != 0:
+        sys.stdout.flush()  # keep our own logs ordered before cvise's output
+
+        # echo cvise's progress as it happens rather than buffering the whole run
+        saw_hard_coded = False
+        with subprocess.Popen(
+            command, stdout=subprocess.PIPE, bufsize=FlagReducer.STREAM_BUFFER_SIZE
+        ) as cvise:
+            for line in cvise.stdout:
+                sys.stdout.buffer.write(line)
+                sys.stdout.buffer.flush()
+                saw_hard_coded |= b"hard-coded" in line
+
+        if cvise.returncode != 0:
             error(
                 "cvise failed. Make sure you have it installed https://github.com/marxin/cvise"
             )
 
-        if "hard-coded" in result.stdout.decode("utf-8"):
+        if saw_hard_coded:
             error("interestingness test does not return 0 for first run-through")
 
         success("flags.txt has been reduced")
@@ -1,10 +1,11 @@
 import argparse
+import errno
 import os
 from pathlib import Path
-import re
 import shutil
 import subprocess
 import sys
+import tempfile
 import textwrap
 
 from icecream import ic
@@ -37,6 +38,34 @@ except ImportError:
 DEBUG = False
 ic.disable()
 
+STREAM_BUFFER_SIZE = 1 << 20
+CONFIG_HEAD_SIZE = 1 << 16
+
+DEFAULT_BUILD_CMD = ("make", f"-j{os.cpu_count()}", "LLVM=1", "V=1")
+
+# matched all at once via str.startswith(tuple) -- a single C-level call per
+# flag, no need for anything fancier with this few prefixes
+CC_FLAG_PREFIXES_TO_REMOVE = (
+    "-I",
+    "-D",
+    "-Wp",
+    "-include",
+    "-Werror",
+    "./",
+    "-U",
+    "-E",
+)
+
+TEST_SH_TEMPLATE = textwrap.dedent(
+    """\
+    #!/usr/bin/env bash
+    CC_CMD() {
+        %(cc)s $(cat %(flags)s) %(fatal)s -c %(target)s
+    }
+    CC_CMD 2>&1 | grep "<your test here>"
+    """
+)
+
 
 def make_dot_i_file(
     build_cmd: Command,
@@ -44,11 +73,14 @@ def make_dot_i_file(
     path_to_linux: Path,
     output_dir: Path,
     force_rm_existing_target: bool,
-) -> tuple[Path, str]:
+) -> tuple[Path, list[bytes]]:
     """
     Make the preprocessed .i file which can then be compiled sans build system
 
-    Returns the path to the .i file as well as the stdout from `make`
+    `make`'s stdout is echoed as it streams in, only the lines which mention
+    `-o target` are kept around (undecoded).
+
+    Returns the path to the .i file as well as the matching lines from `make`
     """
 
     if (abs_target := path_to_linux / target).exists():
@@ -57,18 +89,38 @@ def make_dot_i_file(
         )
 
     info(f"Making {target}...")
-    make_output = subprocess.run(
-        [*build_cmd, target], check=False, capture_output=True, cwd=path_to_linux
-    )
-    ic(make_output)
+    sys.stdout.flush()  # keep our own logs ordered before make's raw output
+
+    needle = b"-o " + os.fsencode(target)
+    matches = []
+    with subprocess.Popen(
+        [*build_cmd, target],
+        stdout=subprocess.PIPE,
+        bufsize=STREAM_BUFFER_SIZE,
+        cwd=path_to_linux,
+    ) as make_proc:
+        for line in make_proc.stdout:
+            sys.stdout.buffer.write(line)
+            sys.stdout.buffer.flush()
+            if needle in line:
+                matches.append(line)
+    sys.stdout.flush()
+    if DEBUG:
+        ic(make_proc.returncode, matches)
 
     destination = output_dir / target.name
-    if make_output.returncode == 0:
+    if make_proc.returncode == 0:
         info(f"Moving generated {target} file to {output_dir}")
-        shutil.move(path_to_linux / target, destination)
+        try:
+            os.replace(abs_target, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # output dir is on a different filesystem, rename can't cross it
+            shutil.move(abs_target, destination)
         success(f"Successfully generated {target.name}")
 
-    return (destination, make_output.stdout.decode("utf-8"))
+    return (destination, matches)
 
 
 def cleanup_dot_i_file(path: Path) -> None:
@@ -81,27 +133,34 @@ def cleanup_dot_i_file(path: Path) -> None:
     The overhead of this function is worth it. Reductions are sped up greatly.
     """
     info(f"Cleaning up {path.name} file for reduction")
-    preprocess_pattern = r"^# .*$"
 
-    file_raw = path.read_text()
-    file_raw = re.sub(preprocess_pattern, "", file_raw, flags=re.MULTILINE)
-
-    path.write_text(file_raw)
+    # stream into a sibling file so we never hold the whole .i file in memory
+    # open the source first so a missing .i file doesn't leave a temp file behind
+    with path.open("rb", buffering=STREAM_BUFFER_SIZE) as fin:
+        cleaned_file = tempfile.NamedTemporaryFile(
+            "wb", dir=path.parent, delete=False, buffering=STREAM_BUFFER_SIZE
+        )
+        try:
+            with cleaned_file as fout:
+                fout.writelines(line for line in fin if not line.startswith(b"# "))
+            shutil.copymode(path, cleaned_file.name)  # NamedTemporaryFile is 0600
+            os.replace(cleaned_file.name, path)
+        except BaseException:
+            os.unlink(cleaned_file.name)  # don't leave a partial temp file around
+            raise
 
 
-def get_compiler_invocation(target: Path, make_stdout: str) -> Command:
+def get_compiler_invocation(matches: list[bytes]) -> Command:
     """
-    Parse out the CC invocation from make's raw output with V=1 on
+    Parse out the CC invocation from the lines of make's output (with V=1 on)
+    that mention our target
     """
-    pattern = f".*-o {target}.*"
-    matches = re.findall(pattern, make_stdout)
-    ic(matches)
     assert (
         len(matches) == 1
     ), "Too many (or too few) compiler invocation matches!\n\
             (not your fault, it's prepreduce's fault)"
 
-    main_invocation = matches[0].split()
+    main_invocation = matches[0].decode("utf-8").split()
     main_invocation.insert(-1, "-c")
     return clean_compiler_invocation(main_invocation)
 
@@ -110,20 +169,14 @@ def clean_compiler_invocation(cc_invocation: Command) -> Command:
     """
     Remove all preprocessor flags as well as any relative pathing in invocation
     """
-
-    to_remove = ("-I", "-D", "-Wp", "-include", "-Werror", "./", "-U", "-E")
-    rules = [
-        (lambda rule: lambda flag: not flag.startswith(rule))(rule)
-        for rule in to_remove
+    cleaned = [
+        flag
+        for flag in cc_invocation
+        if not flag.startswith(CC_FLAG_PREFIXES_TO_REMOVE)
     ]
 
-    cleaned = cc_invocation.copy()
-    for rule in rules:
-        cleaned = filter(rule, cleaned)
-
-    cleaned = list(cleaned)  # eagerly convert iterator to list
-
-    ic(cleaned)
+    if DEBUG:
+        ic(cleaned)
 
     return cleaned
 
@@ -132,20 +185,19 @@ def cc_invocation_to_flags(cc_invocation: Command) -> str:
     """
     Accepts a full cc_invocation command and parses out just the flags
 
-    The order of the pop()'s are important as the relative index of items
-    changes as items are removed
+    `-o target.o` and `-c target.c` are skipped by index in a single pass
     """
-    cc_flags = cc_invocation[1:].copy()  # ditch the `clang` or `gcc` invocation
+    cc_flags = cc_invocation[1:]  # ditch the `clang` or `gcc` invocation
 
     dash_o_idx = cc_flags.index("-o")
-    cc_flags.pop(dash_o_idx + 1)  # remove target.o
-    cc_flags.pop(dash_o_idx)  # remove -o
-
     dash_c_idx = cc_flags.index("-c")
-    cc_flags.pop(dash_c_idx + 1)  # remove target.c
-    cc_flags.pop(dash_c_idx)  # remove -c
+    skip = {dash_o_idx, dash_o_idx + 1, dash_c_idx, dash_c_idx + 1}
 
-    return "\n".join([str(x) for x in cc_flags])  # cast is necessary for Paths
+    return "\n".join(
+        str(flag)  # cast is necessary for Paths
+        for idx, flag in enumerate(cc_flags)
+        if idx not in skip
+    )
 
 
 def write_flags_txt(cc_flags: str, file_location: Path) -> None:
@@ -168,24 +220,22 @@ def write_test_script(
     """
     Create a test.sh script at --output directory
     """
-    script_path = output_dir / Path("test.sh")
+    script_path = output_dir / "test.sh"
     info(f"Generating {script_path}")
     if script_path.exists():
         double_check_removal_with_user(file=script_path, force_rm=force_rm)
 
     cc_flags = cc_invocation_to_flags(cc_invocation)
-    flags_output_file = output_dir / Path("flags.txt")
+    flags_output_file = output_dir / "flags.txt"
 
     write_flags_txt(cc_flags, flags_output_file)
 
-    script_text = textwrap.dedent(
-        f"""    #!/usr/bin/env bash
-    CC_CMD() {{
-        {'clang' if uses_clang else 'gcc'} $(cat {flags_output_file.absolute()}) {'-Wfatal-errors' if go_fast else ''} -c {target.with_suffix('.i').name}
-    }}
-    CC_CMD 2>&1 | grep "<your test here>"
-    """
-    )  # absolute path of flags.txt is required for cvise
+    script_text = TEST_SH_TEMPLATE % {
+        "cc": "clang" if uses_clang else "gcc",
+        "flags": flags_output_file.absolute(),  # absolute path is required for cvise
+        "fatal": "-Wfatal-errors" if go_fast else "",
+        "target": target.with_suffix(".i").name,
+    }
 
     script_path.write_text(script_text, encoding="utf-8")
 
@@ -222,14 +272,12 @@ def setup_argparser(parser: argparse.ArgumentParser) -> None:
     Parse out arguments from command line interface.
     Use various validate_foo_from_cli functions to assist end-user
     """
-    global DEBUG
-
     parser.add_argument(
         "build_command",
         help="The specific build command preamble used sans the target. "
         "Example: `make -j$(nproc) LLVM=1 V=1`",
         nargs="*",
-        default=["make", f"-j{os.cpu_count()}", "LLVM=1", "V=1"],
+        default=list(DEFAULT_BUILD_CMD),
     )
 
     parser.add_argument(
@@ -287,6 +335,8 @@ def setup_argparser(parser: argparse.ArgumentParser) -> None:
 
 
 def validate_cli_args(cli_args):
+    global DEBUG
+
     DEBUG = cli_args.debug
     if DEBUG:
         ic.enable()
@@ -300,7 +350,7 @@ def is_kernel_configured_for_clang(path_to_linux: Path) -> bool:
     currently configured for
     """
 
-    config_file = Path(path_to_linux) / Path(".config")
+    config_file = path_to_linux / ".config"
     if not config_file.exists():
         error(
             f"No .config file found at {config_file}, please configure your "
@@ -308,22 +358,28 @@ def is_kernel_configured_for_clang(path_to_linux: Path) -> bool:
             "change your linux build path with --path-to-linux /path/to/linux"
         )  # intentional newline in above error
 
-    clang_kernel_config_opt = "CONFIG_CC_IS_CLANG=y"
-    gcc_kernel_config_opt = "CONFIG_CC_IS_GCC=y"
-    with config_file.open() as fd:
-        for line in fd:
-            # option is typically found *very* early in the file,
-            # yielding an inexpensive linear search
-            line = line.strip()
-            if clang_kernel_config_opt in line:
-                return True
-            if gcc_kernel_config_opt in line:
-                return False
+    clang_kernel_config_opt = b"CONFIG_CC_IS_CLANG=y"
+    gcc_kernel_config_opt = b"CONFIG_CC_IS_GCC=y"
+    with config_file.open("rb") as fd:
+        # option is typically found *very* early in the file, so only search
+        # the first chunk and fall back to the rest of the file if needed
+        config_raw = fd.read(CONFIG_HEAD_SIZE)
+        if (
+            clang_kernel_config_opt not in config_raw
+            and gcc_kernel_config_opt not in config_raw
+        ):
+            config_raw += fd.read()
+
+    if clang_kernel_config_opt in config_raw:
+        return True
+    if gcc_kernel_config_opt in config_raw:
+        return False
 
     raise EOFError(
         "Upon parsing .config, could not determine gcc or clang usage. "
-        f"reduce prep is specifically looking for `{clang_kernel_config_opt}` "
-        f"or `{gcc_kernel_config_opt}` in your {config_file} file"
+        "reduce prep is specifically looking for "
+        f"`{clang_kernel_config_opt.decode()}` or "
+        f"`{gcc_kernel_config_opt.decode()}` in your {config_file} file"
     )
 
 
@@ -334,9 +390,10 @@ def main(cli_args: argparse.Namespace) -> None:
 
     info(f"Using CC={'clang' if uses_clang else 'gcc'}")
 
-    ic(cli_args)
+    if DEBUG:
+        ic(cli_args)
 
-    path_to_dot_i_file, make_stdout = make_dot_i_file(
+    path_to_dot_i_file, make_matches = make_dot_i_file(
         build_cmd=cli_args.build_command,
         target=cli_args.target,
         path_to_linux=cli_args.path_to_linux,
@@ -346,12 +403,13 @@ def main(cli_args: argparse.Namespace) -> None:
 
     cleanup_dot_i_file(path_to_dot_i_file)
 
-    cc_invocation = get_compiler_invocation(cli_args.target, make_stdout)
+    cc_invocation = get_compiler_invocation(make_matches)
     cc_invocation[
         -1
     ] = cli_args.target.name  # HACK: should search for .c instead of using -1
 
-    ic(cc_invocation)
+    if DEBUG:
+        ic(cc_invocation)
 
     write_test_script(
         cc_invocation=cc_invocation,